@@ -50,6 +50,49 @@ def format_timestamp(seconds):
     hours, minutes = divmod(minutes, 60)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
+def to_mono(block):
+    """Convertit un bloc audio stéréo en mono (moyenne des canaux)"""
+    if block.ndim > 1:
+        return block.mean(axis=1, dtype=np.float32)
+    return block
+
+def compute_peak(snd, blocksize=65536):
+    """
+    Calcule l'amplitude maximale du signal mono en lisant le fichier par blocs,
+    sans jamais charger l'audio complet en mémoire.
+    
+    Args:
+        snd (soundfile.SoundFile): Fichier audio ouvert
+        blocksize (int): Nombre d'échantillons lus par bloc
+        
+    Returns:
+        float: Amplitude maximale (1.0 si le signal est silencieux)
+    """
+    peak = 0.0
+    snd.seek(0)
+    for block in snd.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+        peak = max(peak, float(np.max(np.abs(to_mono(block)), initial=0.0)))
+    return peak if peak > 0 else 1.0
+
+def read_segment(snd, start_frame, end_frame, peak):
+    """
+    Lit uniquement les échantillons d'un segment, convertis en mono et normalisés.
+    
+    Args:
+        snd (soundfile.SoundFile): Fichier audio ouvert
+        start_frame (int): Premier échantillon du segment
+        end_frame (int): Échantillon de fin du segment (exclu)
+        peak (float): Amplitude maximale utilisée pour la normalisation
+        
+    Returns:
+        numpy.ndarray: Segment mono en float32
+    """
+    snd.seek(start_frame)
+    block = snd.read(end_frame - start_frame, dtype="float32", always_2d=True)
+    segment_audio = to_mono(block)
+    segment_audio /= np.float32(peak)
+    return segment_audio
+
 def transcribe_with_speaker_diarization(audio_file, output_file, num_speakers=None):
     """
     Transcrit un fichier audio en identifiant les différents locuteurs.
@@ -98,52 +141,57 @@ def transcribe_with_speaker_diarization(audio_file, output_file, num_speakers=No
             return
         audio_file = wav_file
     
-    # Charger l'audio avec soundfile
+    # Ouvrir l'audio sans le charger entièrement en mémoire
     try:
-        signal, fs = sf.read(audio_file)
-        if len(signal.shape) > 1:  # Convertir stéréo en mono si nécessaire
-            signal = np.mean(signal, axis=1)
+        snd = sf.SoundFile(audio_file)
     except Exception as e:
         print(f"Erreur lors de la lecture du fichier audio: {e}")
         return
     
-    # Normaliser le signal audio
-    signal = signal / np.max(np.abs(signal))
-    
-    for segment in segments:
-        start_time = segment["start"]
-        end_time = segment["end"]
+    with snd:
+        fs = snd.samplerate
         
-        # Extraire le segment audio
-        start_frame = int(start_time * fs)
-        end_frame = int(end_time * fs)
-        
-        if end_frame <= start_frame:
-            continue
-        
-        segment_audio = signal[start_frame:end_frame]
-        
-        # Vérifier si le segment est assez long
-        if len(segment_audio) < 0.5 * fs:  # Moins de 0.5 seconde
-            continue
-        
-        # Convertir en tensor pour SpeechBrain
-        segment_tensor = torch.FloatTensor(segment_audio).unsqueeze(0)
+        # Calculer le pic du signal mono pour la normalisation
+        try:
+            peak = compute_peak(snd)
+        except Exception as e:
+            print(f"Erreur lors de la lecture du fichier audio: {e}")
+            return
         
-        # Extraire l'embedding
-        with torch.no_grad():
-            try:
-                emb = spk_model.encode_batch(segment_tensor)
-                emb = emb.squeeze().cpu().numpy()
-                embeddings.append(emb)
-                segment_info.append({
-                    "start": start_time,
-                    "end": end_time,
-                    "text": segment["text"]
-                })
-            except Exception as e:
-                print(f"Erreur lors de l'extraction d'embedding: {e}")
+        for segment in segments:
+            start_time = segment["start"]
+            end_time = segment["end"]
+            
+            # Extraire le segment audio
+            start_frame = int(start_time * fs)
+            end_frame = min(int(end_time * fs), snd.frames)
+            
+            if end_frame <= start_frame:
+                continue
+            
+            # Vérifier si le segment est assez long
+            if end_frame - start_frame < 0.5 * fs:  # Moins de 0.5 seconde
                 continue
+            
+            segment_audio = read_segment(snd, start_frame, end_frame, peak)
+            
+            # Convertir en tensor pour SpeechBrain
+            segment_tensor = torch.from_numpy(segment_audio).unsqueeze(0)
+            
+            # Extraire l'embedding
+            with torch.no_grad():
+                try:
+                    emb = spk_model.encode_batch(segment_tensor)
+                    emb = emb.squeeze().cpu().numpy()
+                    embeddings.append(emb)
+                    segment_info.append({
+                        "start": start_time,
+                        "end": end_time,
+                        "text": segment["text"]
+                    })
+                except Exception as e:
+                    print(f"Erreur lors de l'extraction d'embedding: {e}")
+                    continue
     
     if len(embeddings) == 0:
         print("Aucun embedding extrait. Vérifiez l'audio.")